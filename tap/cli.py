@@ -1,6 +1,7 @@
 """CLI入口模块"""
 
 import sys
+import logging
 import argparse
 from .config import get_config
 from .commands import CheckCommand, FlushCommand
@@ -71,8 +72,8 @@ def add_check_subparser(subparsers):
     """添加check子命令"""
     check_parser = subparsers.add_parser('check', help='校验文件字段与数据表字段是否匹配')
     check_parser.add_argument('file_path', help='Excel/CSV文件路径')
-    check_parser.add_argument('--frozen-zone', default='0:5', help='冻结区域列范围，数字索引，格式: start:end 或单个数字 (默认: 0:5，对应A-F列)')
-    check_parser.add_argument('--data-zone', default='6:25', help='数据区域列范围，数字索引，格式: start:end 或单个数字 (默认: 6:25，对应G-Z列)')
+    check_parser.add_argument('--frozen-zone', default='0:5', help='冻结区域列范围，数字索引或列字母，格式: start:end 或单列 (默认: 0:5，即A:F列)')
+    check_parser.add_argument('--data-zone', default='6:25', help='数据区域列范围，数字索引或列字母，格式: start:end 或单列 (默认: 6:25，即G:Z列)')
     check_parser.add_argument('--table-id', required=True, help='数据表ID')
 
 
@@ -92,8 +93,8 @@ def add_flush_subparser(subparsers):
     """添加flush子命令"""
     flush_parser = subparsers.add_parser('flush', help='同步数据到飞书多维表格')
     flush_parser.add_argument('file_path', help='Excel/CSV文件路径')
-    flush_parser.add_argument('--frozen-zone', default='0:5', help='冻结区域列范围，数字索引，格式: start:end 或单个数字 (默认: 0:5，对应A-F列)')
-    flush_parser.add_argument('--data-zone', default='6:25', help='数据区域列范围，数字索引，格式: start:end 或单个数字 (默认: 6:25，对应G-Z列)')
+    flush_parser.add_argument('--frozen-zone', default='0:5', help='冻结区域列范围，数字索引或列字母，格式: start:end 或单列 (默认: 0:5，即A:F列)')
+    flush_parser.add_argument('--data-zone', default='6:25', help='数据区域列范围，数字索引或列字母，格式: start:end 或单列 (默认: 6:25，即G:Z列)')
     flush_parser.add_argument('--table-id', required=True, help='数据表ID')
     flush_parser.add_argument('--mode', default='record', choices=['field', 'record'], 
                               help='同步模式 (默认: record)')
@@ -131,6 +132,8 @@ def main():
         """
     )
     
+    parser.add_argument('-v', '--verbose', action='store_true', help='输出调试日志')
+    
     subparsers = parser.add_subparsers(dest='command', help='可用命令')
     
     # 添加子命令
@@ -140,6 +143,15 @@ def main():
     
     args = parser.parse_args()
     
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(message)s',
+        stream=sys.stdout
+    )
+    # 第三方库的调试日志过于冗长，仅保留tap自身的调试输出
+    logging.getLogger('urllib3').setLevel(logging.WARNING)
+    logging.getLogger('filelock').setLevel(logging.WARNING)
+    
     if args.command == 'config':
         handle_config(args)
     elif args.command == 'check':
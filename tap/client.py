@@ -1,18 +1,156 @@
 """飞书API客户端模块"""
 
+import os
+import gzip
+import json
+import logging
 import time
+import random
+import threading
 import requests
-from typing import Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Optional, Dict, Any, List, Iterator
 from .config import get_config
 
+logger = logging.getLogger(__name__)
+
 # API基础地址
 FEISHU_API_BASE = "https://open.feishu.cn/open-apis"
 
+# 接口路径模板
+TENANT_TOKEN_ENDPOINT = "/auth/v3/tenant_access_token/internal"
+APPS_ENDPOINT = "/bitable/v1/apps"
+APP_ENDPOINT = APPS_ENDPOINT + "/{app_token}"
+TABLES_ENDPOINT = APP_ENDPOINT + "/tables"
+TABLE_ENDPOINT = TABLES_ENDPOINT + "/{table_id}"
+
 # 重试配置
 MAX_RETRIES = 5  # 最大重试次数
 INITIAL_BACKOFF = 1  # 初始退避时间（秒）
 MAX_BACKOFF = 60  # 最大退避时间（秒）
 BACKOFF_MULTIPLIER = 2  # 退避倍数
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)  # 可重试的HTTP状态码
+RETRY_API_CODES = (9, 9999, 1254291)  # 可重试的API错误码（内部错误；写冲突仅在其他进程同时写同一数据表时兜底）
+TOKEN_INVALID_CODES = (99991661, 99991663)  # tenant_access_token无效/过期
+
+# 连接池配置
+POOL_CONNECTIONS = 32  # 缓存的主机连接池数量
+POOL_MAXSIZE = 64  # 每个主机连接池的最大连接数
+
+# 自适应并发配置
+INITIAL_CONCURRENCY = 4  # 初始在途请求数上限
+MAX_CONCURRENCY = POOL_MAXSIZE  # 在途请求数上限的最大值
+
+# 客户端限速配置（可通过环境变量 TAP_RPS 调整每秒请求数）
+DEFAULT_RPS = 15  # 每秒请求数
+BUCKET_CAPACITY = 20  # 令牌桶容量（允许的突发请求数）
+
+# 请求体压缩配置（设置环境变量 TAP_GZIP=1 开启，需服务端支持 Content-Encoding: gzip）
+GZIP_REQUESTS = os.getenv("TAP_GZIP", "0") == "1"
+GZIP_MIN_SIZE = 2048  # 超过该字节数的请求体才压缩
+
+
+class TransientError(Exception):
+    """可重试的错误（限流、服务器错误、网络错误等）在重试耗尽后仍未恢复"""
+
+
+def _parse_retry_after(response) -> Optional[float]:
+    """解析服务端建议的等待时间（秒）
+
+    优先使用标准Retry-After头（秒数或HTTP日期），其次使用飞书网关的x-ogw-ratelimit-reset头
+    """
+    value = response.headers.get("Retry-After") or response.headers.get("x-ogw-ratelimit-reset")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_wait(backoff: float, retry_after: Optional[float] = None) -> float:
+    """计算重试等待时间
+
+    服务端给出建议等待时间时直接采用；否则对指数退避时间加入随机抖动（equal jitter），
+    避免多个进程同时重试造成请求风暴
+    """
+    if retry_after is not None:
+        return min(retry_after, MAX_BACKOFF)
+    capped = min(backoff, MAX_BACKOFF)
+    return random.uniform(capped / 2, capped)
+
+
+class TokenBucket:
+    """令牌桶限速器，按固定速率发放令牌，主动避免触发服务端429"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """取走一个令牌，令牌不足时阻塞等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
+class ConcurrencyLimiter:
+    """AIMD自适应并发限制器
+
+    请求成功时并发上限加1（加性增），遇到429时减半（乘性减），
+    使在途请求数自动收敛到服务端可承受的水平
+    """
+    
+    def __init__(self, initial: int = INITIAL_CONCURRENCY, max_limit: int = MAX_CONCURRENCY):
+        self.limit = initial
+        self.max_limit = max_limit
+        self._in_flight = 0
+        self._cond = threading.Condition()
+    
+    @contextmanager
+    def acquire(self):
+        """占用一个并发名额，超过上限时阻塞等待"""
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify()
+    
+    def on_success(self) -> None:
+        """请求成功，加性增大并发上限"""
+        with self._cond:
+            if self.limit < self.max_limit:
+                self.limit += 1
+                self._cond.notify()
+    
+    def on_drop(self) -> None:
+        """请求被限流，乘性减小并发上限"""
+        with self._cond:
+            self.limit = max(1, self.limit // 2)
+
 
 class FeishuClient:
     """飞书API客户端"""
@@ -23,16 +161,76 @@ class FeishuClient:
         self.session.headers.update({
             "Content-Type": "application/json"
         })
+        # 复用keep-alive连接；重试由 _request 统一处理，适配器层不重试
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                              max_retries=Retry(total=0))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # 进程内token缓存，有效期内无需访问config
+        self._token: Optional[str] = None
+        self._token_expires_at: float = 0
+        self._token_lock = threading.Lock()
+        self._rejected_token: Optional[str] = None  # 被服务端判定为失效的token，不再从config复用
+        
+        self._limiter = ConcurrencyLimiter()
+        self._bucket = TokenBucket(rate=self._read_rps(), capacity=BUCKET_CAPACITY)
+        
+        # (app_token, table_id) -> 数据表接口路径前缀
+        self._table_endpoints: Dict[tuple, str] = {}
+        
+        # 预先获取token：token需刷新时顺带建立到飞书的TLS连接，首个业务请求可直接复用
+        if self.config.is_configured():
+            try:
+                self._get_tenant_access_token()
+            except Exception as e:
+                logger.debug("预取tenant_access_token失败: %s", e)
+    
+    @staticmethod
+    def _read_rps() -> float:
+        """读取环境变量 TAP_RPS，无法解析或不为正数时回退到默认值"""
+        value = os.getenv("TAP_RPS")
+        if value is None:
+            return DEFAULT_RPS
+        try:
+            rps = float(value)
+        except ValueError:
+            rps = 0
+        if not (0 < rps < float("inf")):
+            logger.warning("⚠️  TAP_RPS=%r 无效，使用默认值 %s", value, DEFAULT_RPS)
+            return DEFAULT_RPS
+        return rps
     
     def _get_tenant_access_token(self) -> str:
         """获取tenant_access_token"""
-        # 检查是否已有有效的token
-        if self.config.tenant_access_token and self.config.tenant_access_token_expires_at:
-            if time.time() < self.config.tenant_access_token_expires_at:
-                return self.config.tenant_access_token
+        if self._token and time.time() < self._token_expires_at:
+            return self._token
         
-        # 获取新的token
-        url = f"{FEISHU_API_BASE}/auth/v3/tenant_access_token/internal"
+        with self._token_lock:
+            if not (self._token and time.time() < self._token_expires_at):
+                self._refresh_tenant_access_token()
+            return self._token
+    
+    def _refresh_tenant_access_token(self) -> None:
+        """从config加载或重新获取tenant_access_token，并写入进程内缓存
+
+        持有配置文件锁完成"重新读取-获取-写回"，并发运行的多个tap进程共享同一个token
+        """
+        with self.config.lock():
+            self.config.reload_token()
+            
+            # 检查config中是否已有有效的token（可能已由其他进程刷新）
+            token = self.config.tenant_access_token
+            expires_at = self.config.tenant_access_token_expires_at
+            if token and expires_at and token != self._rejected_token and time.time() < expires_at:
+                self._set_token(token, expires_at)
+                return
+            
+            self._fetch_tenant_access_token()
+    
+    def _fetch_tenant_access_token(self) -> None:
+        """请求新的tenant_access_token并保存到config"""
+        url = FEISHU_API_BASE + TENANT_TOKEN_ENDPOINT
         payload = {
             "app_id": self.config.app_id,
             "app_secret": self.config.app_secret
@@ -50,73 +248,138 @@ class FeishuClient:
         self.config.tenant_access_token_expires_at = int(time.time()) + data.get("expire", 7200) - 60
         self.config.save()
         
-        return self.config.tenant_access_token
+        self._set_token(self.config.tenant_access_token, self.config.tenant_access_token_expires_at)
+    
+    def _set_token(self, token: str, expires_at: float) -> None:
+        """写入进程内token缓存，并设置到session的默认请求头"""
+        self._token = token
+        self._token_expires_at = expires_at
+        self.session.headers["Authorization"] = f"Bearer {token}"
+    
+    def _invalidate_token(self) -> None:
+        """token失效时清除进程内缓存，下次请求时重新获取"""
+        with self._token_lock:
+            if self._token:
+                self._rejected_token = self._token
+            self._token = None
+            self._token_expires_at = 0
+            # 不从session请求头中删除Authorization：其他线程可能正在遍历该字典，刷新token时会直接覆盖
+    
+    def _table_endpoint(self, app_token: str, table_id: str) -> str:
+        """获取数据表接口路径前缀（按 app_token/table_id 缓存）"""
+        key = (app_token, table_id)
+        endpoint = self._table_endpoints.get(key)
+        if endpoint is None:
+            endpoint = self._table_endpoints[key] = TABLE_ENDPOINT.format(app_token=app_token, table_id=table_id)
+        return endpoint
     
     def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
         """发送API请求（带重试和指数退避）"""
-        token = self._get_tenant_access_token()
         url = f"{FEISHU_API_BASE}{endpoint}"
-        
-        headers = kwargs.pop("headers", {})
-        headers["Authorization"] = f"Bearer {token}"
-        
         backoff = INITIAL_BACKOFF
         
+        # 预先序列化请求体：中文按UTF-8原样输出，避免\uXXXX转义使批量请求体积翻倍，且重试时无需重复序列化
+        if "json" in kwargs:
+            body = json.dumps(kwargs.pop("json"), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            # 大请求体（如批量创建记录）压缩后上传
+            if GZIP_REQUESTS and len(body) > GZIP_MIN_SIZE:
+                body = gzip.compress(body)
+                kwargs["headers"] = {**kwargs.get("headers", {}), "Content-Encoding": "gzip"}
+            kwargs["data"] = body
+        
         for attempt in range(MAX_RETRIES):
+            is_last = attempt == MAX_RETRIES - 1
+            retry_after = None
+            
             try:
-                response = self.session.request(method, url, headers=headers, **kwargs)
-                
-                # 处理429错误（请求频率过高）
-                if response.status_code == 429:
-                    wait_time = min(backoff, MAX_BACKOFF)
-                    print(f"⚠️  请求频率过高 (429)，等待 {wait_time} 秒后重试 ({attempt + 1}/{MAX_RETRIES})...")
-                    time.sleep(wait_time)
-                    backoff *= BACKOFF_MULTIPLIER
-                    continue
+                # Authorization 由 _set_token 设置在session默认请求头上
+                self._get_tenant_access_token()
+                self._bucket.acquire()
+                with self._limiter.acquire():
+                    response = self.session.request(method, url, **kwargs)
+                status = response.status_code
                 
-                response.raise_for_status()
-                data = response.json()
+                if status == 404:
+                    raise Exception(f"API路径不存在: {endpoint}\n可能原因: 1)应用缺少多维表格权限 2)应用未在企业内安装 3)app_token不正确")
                 
+                if status == 401:
+                    # token过期或被吊销，重新获取后重试
+                    self._invalidate_token()
+                    reason = "token已失效 (401)"
+                    retry_after = 0
+                    if is_last:
+                        raise Exception(f"HTTP错误: {reason}")
+                elif status in RETRY_STATUS_CODES:
+                    # 429（请求频率过高）或服务器错误，可以重试
+                    if status == 429:
+                        self._limiter.on_drop()
+                    reason = "请求频率过高 (429)" if status == 429 else f"服务器错误 ({status})"
+                    retry_after = _parse_retry_after(response)
+                    if is_last:
+                        raise TransientError(f"HTTP错误: {reason}")
+                else:
+                    # 飞书的业务错误（如token失效）也会以HTTP 400等状态码返回，响应体中带有错误码，先解析再判断
+                    try:
+                        data = json.loads(response.content)
+                    except ValueError:
+                        response.raise_for_status()
+                        raise
+                    if status >= 400 and not (isinstance(data, dict) and "code" in data):
+                        response.raise_for_status()
+                    
+                    # 成功获取响应，检查API返回码
+                    error_code = data.get("code")
+                    if error_code == 0:
+                        self._limiter.on_success()
+                        return data.get("data", {})
+                    
+                    error_msg = data.get("msg", "")
+                    if error_code in TOKEN_INVALID_CODES and not is_last:
+                        self._invalidate_token()
+                        retry_after = 0
+                    # 某些错误码可以重试（内部错误、token失效等）
+                    elif error_code not in RETRY_API_CODES:
+                        raise Exception(f"API请求失败: [{error_code}] {error_msg}")
+                    elif is_last:
+                        raise TransientError(f"API请求失败: [{error_code}] {error_msg}")
+                    reason = f"API错误码 {error_code} ({error_msg})"
+            
             except requests.exceptions.HTTPError as e:
-                if response.status_code == 404:
-                    raise Exception(f"API路径不存在: {endpoint}\n可能原因: 1)应用缺少多维表格权限 2)应用未在企业内安装 3)app_token不正确")
-                # 其他HTTP错误也尝试重试
-                if response.status_code in (429, 500, 502, 503, 504) and attempt < MAX_RETRIES - 1:
-                    wait_time = min(backoff, MAX_BACKOFF)
-                    print(f"⚠️  服务器错误 ({response.status_code})，等待 {wait_time} 秒后重试 ({attempt + 1}/{MAX_RETRIES})...")
-                    time.sleep(wait_time)
-                    backoff *= BACKOFF_MULTIPLIER
-                    continue
+                # 错误可能来自获取token的请求，以异常携带的响应为准
+                if e.response is not None:
+                    logger.debug("HTTP错误响应: %s", e.response.text)
                 raise Exception(f"HTTP错误: {e}")
-            except Exception as e:
-                if attempt < MAX_RETRIES - 1:
-                    wait_time = min(backoff, MAX_BACKOFF)
-                    print(f"⚠️  请求错误: {e}，等待 {wait_time} 秒后重试 ({attempt + 1}/{MAX_RETRIES})...")
-                    time.sleep(wait_time)
-                    backoff *= BACKOFF_MULTIPLIER
-                    continue
-                raise Exception(f"请求错误: {e}")
+            except (requests.exceptions.RequestException, ValueError) as e:
+                # 网络错误或响应不是合法JSON
+                if is_last:
+                    raise TransientError(f"请求错误: {e}")
+                reason = f"请求错误: {e}"
             
-            # 成功获取响应，检查API返回码
-            if data.get("code") != 0:
-                error_msg = data.get("msg", "")
-                error_code = data.get("code", "")
-                
-                # 某些错误码可以重试
-                retry_codes = [9, 9999]  # 内部错误等
-                if error_code in retry_codes and attempt < MAX_RETRIES - 1:
-                    wait_time = min(backoff, MAX_BACKOFF)
-                    print(f"⚠️  API错误码 {error_code} ({error_msg})，等待 {wait_time} 秒后重试 ({attempt + 1}/{MAX_RETRIES})...")
-                    time.sleep(wait_time)
-                    backoff *= BACKOFF_MULTIPLIER
-                    continue
-                
-                raise Exception(f"API请求失败: [{error_code}] {error_msg}")
-            
-            return data.get("data", {})
+            wait_time = _backoff_wait(backoff, retry_after)
+            logger.warning("⚠️  %s，等待 %.1f 秒后重试 (%d/%d)...", reason, wait_time, attempt + 1, MAX_RETRIES)
+            time.sleep(wait_time)
+            backoff *= BACKOFF_MULTIPLIER
         
         # 超过最大重试次数
-        raise Exception(f"请求失败，已达到最大重试次数 ({MAX_RETRIES})")
+        raise TransientError(f"请求失败，已达到最大重试次数 ({MAX_RETRIES})")
+    
+    def _paginate(self, endpoint: str, params: Dict[str, Any]) -> Iterator[Dict]:
+        """遍历分页接口的所有条目
+
+        调用方处理当前页时，后台线程已在请求下一页，网络等待与数据处理重叠
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self._request, "GET", endpoint, params=params)
+            while future is not None:
+                data = future.result()
+                
+                # 还有更多数据时立即预取下一页
+                page_token = data.get("has_more") and data.get("page_token")
+                future = executor.submit(self._request, "GET", endpoint,
+                                         params={**params, "page_token": page_token}) if page_token else None
+                
+                # items可能为null
+                yield from data.get("items") or ()
     
     # ==================== 应用级API ====================
     
@@ -128,80 +391,40 @@ class FeishuClient:
     
     def get_bitable_list(self, page_size: int = 50) -> List[Dict]:
         """获取多维表格列表"""
-        items = []
-        page_token = None
-        
-        while True:
-            params = {"page_size": page_size}
-            if page_token:
-                params["page_token"] = page_token
-            
-            data = self._request("GET", "/bitable/v1/apps", params=params)
-            
-            # 安全获取items
-            page_items = data.get("items")
-            if page_items is not None:
-                items.extend(page_items)
-            
-            # 检查是否还有更多数据
-            has_more = data.get("has_more", False)
-            if not has_more:
-                break
-            
-            page_token = data.get("page_token")
-            if not page_token:
-                break
-        
-        return items
+        return list(self.iter_bitable_list(page_size))
+    
+    def iter_bitable_list(self, page_size: int = 50) -> Iterator[Dict]:
+        """逐页遍历多维表格列表"""
+        return self._paginate(APPS_ENDPOINT, {"page_size": page_size})
     
     def get_bitable(self, app_token: str) -> Dict[str, Any]:
         """获取多维表格信息"""
-        return self._request("GET", f"/bitable/v1/apps/{app_token}")
+        return self._request("GET", APP_ENDPOINT.format(app_token=app_token))
     
     # ==================== 表API ====================
     
     def get_tables(self, app_token: str) -> List[Dict]:
         """获取数据表列表"""
-        data = self._request("GET", f"/bitable/v1/apps/{app_token}/tables")
+        data = self._request("GET", TABLES_ENDPOINT.format(app_token=app_token))
         return data.get("items", [])
     
     def get_table(self, app_token: str, table_id: str) -> Dict[str, Any]:
         """获取数据表信息"""
-        return self._request("GET", f"/bitable/v1/apps/{app_token}/tables/{table_id}")
+        return self._request("GET", self._table_endpoint(app_token, table_id))
     
     # ==================== 字段API ====================
     
     def get_fields(self, app_token: str, table_id: str) -> List[Dict]:
         """获取字段列表"""
-        items = []
-        page_token = None
-        
-        while True:
-            params = {"page_size": 100}
-            if page_token:
-                params["page_token"] = page_token
-            
-            data = self._request("GET", f"/bitable/v1/apps/{app_token}/tables/{table_id}/fields", params=params)
-            
-            # 安全获取items，处理可能为null的情况
-            page_items = data.get("items")
-            if page_items is not None:
-                items.extend(page_items)
-            
-            # 检查是否还有更多数据
-            has_more = data.get("has_more", False)
-            if not has_more:
-                break
-            
-            page_token = data.get("page_token")
-            if not page_token:
-                break
-        
-        return items
+        return list(self.iter_fields(app_token, table_id))
+    
+    def iter_fields(self, app_token: str, table_id: str) -> Iterator[Dict]:
+        """逐页遍历字段列表"""
+        return self._paginate(self._table_endpoint(app_token, table_id) + "/fields", {"page_size": 100})
     
     def get_field(self, app_token: str, table_id: str, field_id: str) -> Dict[str, Any]:
         """获取字段详情"""
-        return self._request("GET", f"/bitable/v1/apps/{app_token}/tables/{table_id}/fields/{field_id}")
+        return self._request("GET", self._table_endpoint(app_token, table_id) + f"/fields/{field_id}")
     
     def create_fields(self, app_token: str, table_id: str, fields: List[Dict[str, Any]]) -> Dict[str, Any]:
         """批量创建字段
@@ -215,7 +438,7 @@ class FeishuClient:
             API响应结果
         """
         payload = {"fields": fields}
-        return self._request("POST", f"/bitable/v1/apps/{app_token}/tables/{table_id}/fields/batch_create", json=payload)
+        return self._request("POST", self._table_endpoint(app_token, table_id) + "/fields/batch_create", json=payload)
     
     def create_field(self, app_token: str, table_id: str, field_name: str, field_type: str, 
                      options: Optional[Dict] = None) -> Dict[str, Any]:
@@ -227,7 +450,7 @@ class FeishuClient:
         if options:
             payload["property"] = options
 
-        return self._request("POST", f"/bitable/v1/apps/{app_token}/tables/{table_id}/fields", json=payload)
+        return self._request("POST", self._table_endpoint(app_token, table_id) + "/fields", json=payload)
     
     def update_field(self, app_token: str, table_id: str, field_id: str, 
                      field_name: Optional[str] = None, options: Optional[Dict] = None) -> Dict[str, Any]:
@@ -238,11 +461,11 @@ class FeishuClient:
         if options:
             payload["property"] = options
         
-        return self._request("PUT", f"/bitable/v1/apps/{app_token}/tables/{table_id}/fields/{field_id}", json=payload)
+        return self._request("PUT", self._table_endpoint(app_token, table_id) + f"/fields/{field_id}", json=payload)
     
     def delete_field(self, app_token: str, table_id: str, field_id: str) -> Dict[str, Any]:
         """删除字段"""
-        return self._request("DELETE", f"/bitable/v1/apps/{app_token}/tables/{table_id}/fields/{field_id}")
+        return self._request("DELETE", self._table_endpoint(app_token, table_id) + f"/fields/{field_id}")
     
     # ==================== 记录API ====================
     
@@ -250,37 +473,21 @@ class FeishuClient:
                     field_names: Optional[List[str]] = None,
                     page_size: int = 500) -> List[Dict]:
         """获取记录列表"""
-        items = []
-        page_token = None
-        
-        while True:
-            params = {"page_size": min(page_size, 500)}
-            if page_token:
-                params["page_token"] = page_token
-            if field_names:
-                params["field_names"] = ",".join(field_names)
-            
-            data = self._request("GET", f"/bitable/v1/apps/{app_token}/tables/{table_id}/records", params=params)
-            
-            # 安全获取items
-            page_items = data.get("items")
-            if page_items is not None:
-                items.extend(page_items)
-            
-            # 检查是否还有更多数据
-            has_more = data.get("has_more", False)
-            if not has_more:
-                break
-            
-            page_token = data.get("page_token")
-            if not page_token:
-                break
-        
-        return items
+        return list(self.iter_records(app_token, table_id, field_names, page_size))
+    
+    def iter_records(self, app_token: str, table_id: str,
+                     field_names: Optional[List[str]] = None,
+                     page_size: int = 500) -> Iterator[Dict]:
+        """逐页遍历记录列表，每次只在内存中保留一页数据"""
+        params = {"page_size": min(page_size, 500)}
+        if field_names:
+            # 接口要求 JSON 数组格式的字符串，如 ["字段1","字段2"]
+            params["field_names"] = json.dumps(field_names, ensure_ascii=False)
+        return self._paginate(self._table_endpoint(app_token, table_id) + "/records", params)
     
     def get_record(self, app_token: str, table_id: str, record_id: str) -> Dict[str, Any]:
         """获取单条记录"""
-        return self._request("GET", f"/bitable/v1/apps/{app_token}/tables/{table_id}/records/{record_id}")
+        return self._request("GET", self._table_endpoint(app_token, table_id) + f"/records/{record_id}")
     
     def create_record(self, app_token: str, table_id: str, fields: Dict[str, Any],
                       uuid: Optional[str] = None) -> Dict[str, Any]:
@@ -289,7 +496,7 @@ class FeishuClient:
         if uuid:
             payload["uuid"] = uuid
         
-        result = self._request("POST", f"/bitable/v1/apps/{app_token}/tables/{table_id}/records", json=payload)
+        result = self._request("POST", self._table_endpoint(app_token, table_id) + "/records", json=payload)
         # 返回 record_id 而不是完整对象
         if result and "record" in result:
             return result["record"]
@@ -302,50 +509,57 @@ class FeishuClient:
         if uuid_key:
             payload["uuid_key"] = uuid_key
         
-        return self._request("POST", f"/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_create", json=payload)
+        return self._request("POST", self._table_endpoint(app_token, table_id) + "/records/batch_create", json=payload)
     
     def update_record(self, app_token: str, table_id: str, record_id: str, 
                       fields: Dict[str, Any]) -> Dict[str, Any]:
         """更新记录"""
         payload = {"fields": fields}
-        return self._request("PUT", f"/bitable/v1/apps/{app_token}/tables/{table_id}/records/{record_id}", json=payload)
+        return self._request("PUT", self._table_endpoint(app_token, table_id) + f"/records/{record_id}", json=payload)
     
     def update_records(self, app_token: str, table_id: str, records: List[Dict]) -> Dict[str, Any]:
         """批量更新记录"""
         payload = {"records": records}
-        return self._request("POST", f"/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_update", json=payload)
+        return self._request("POST", self._table_endpoint(app_token, table_id) + "/records/batch_update", json=payload)
     
     def delete_record(self, app_token: str, table_id: str, record_id: str) -> Dict[str, Any]:
         """删除记录"""
-        return self._request("DELETE", f"/bitable/v1/apps/{app_token}/tables/{table_id}/records/{record_id}")
+        return self._request("DELETE", self._table_endpoint(app_token, table_id) + f"/records/{record_id}")
     
     def delete_records(self, app_token: str, table_id: str, record_ids: List[str]) -> Dict[str, Any]:
         """批量删除记录"""
         payload = {"records": [{"record_id": rid} for rid in record_ids]}
-        return self._request("POST", f"/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_delete", json=payload)
+        return self._request("POST", self._table_endpoint(app_token, table_id) + "/records/batch_delete", json=payload)
     
     def batch_get_records(self, app_token: str, table_id: str, 
                           record_ids: List[str]) -> Dict[str, Any]:
         """批量获取记录"""
         params = {"record_ids": ",".join(record_ids)}
-        return self._request("GET", f"/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_get", params=params)
+        return self._request("GET", self._table_endpoint(app_token, table_id) + "/records/batch_get", params=params)
 
 # 全局客户端实例
 _client: Optional[FeishuClient] = None
 _client_config_id: Optional[int] = None
+_client_lock = threading.Lock()
 
 def get_client(config=None) -> FeishuClient:
     """获取全局客户端实例"""
     global _client, _client_config_id
-    config_id = id(config) if config else None
+    # 未传入config时使用全局配置，与显式传入全局配置的调用方共用同一实例（及其连接池）
+    config = config or get_config()
+    config_id = id(config)
     
-    # 如果没有传入config或者config id不匹配，创建新实例
+    # config id不匹配时创建新实例（双重检查，避免多线程重复创建）
     if _client is None or _client_config_id != config_id:
-        _client = FeishuClient(config)
-        _client_config_id = config_id
+        with _client_lock:
+            if _client is None or _client_config_id != config_id:
+                _client = FeishuClient(config)
+                _client_config_id = config_id
     return _client
 
 def reset_client():
     """重置客户端"""
-    global _client
-    _client = None
+    global _client, _client_config_id
+    with _client_lock:
+        _client = None
+        _client_config_id = None
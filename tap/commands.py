@@ -1,14 +1,63 @@
 """命令模块"""
 
-import time
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
+from openpyxl.utils import get_column_letter
 from .config import get_config
-from .client import get_client
+from .client import get_client, TransientError
 from .reader import get_reader
 
-# 请求间隔配置（秒）
-REQUEST_INTERVAL = 0.2  # 每次请求间隔0.2秒
+logger = logging.getLogger(__name__)
+
+# 批量写入配置
+BATCH_SIZE = 500  # 每次批量请求的最大记录数
+FLUSH_WORKERS = 1  # 写入线程数：同一数据表不支持并发写入（写冲突 1254291），批次串行写入，只与读取文件并行
+MAX_PENDING_BATCHES = FLUSH_WORKERS * 2  # 排队和写入中的批次上限，读取快于写入时暂停读取
+LINK_FETCH_WORKERS = 8  # 并发拉取关联表的线程数
+
+# 组成数据ID的冻结区域字段（按拼接顺序）
+_DATA_ID_KEYS = ("企业ID", "数据集", "会计期间", "报表类型")
+
+
+def _to_str(value) -> str:
+    """安全转换为字符串"""
+    # 单元格值多数本身就是字符串，优先判断
+    if type(value) is str:
+        return value
+    if value is None:
+        return ""
+    if type(value) is list:
+        return ",".join(map(str, value))
+    return str(value)
+
+
+def _log_failures(action: str, failures: List[Tuple[str, Exception]]) -> None:
+    """汇总输出逐条回退中失败的记录，逐条明细只在 -v 时输出"""
+    if not failures:
+        return
+    for item, e in failures:
+        logger.debug("❌ %s %s 失败: %s", action, item, e)
+    item, e = failures[0]
+    logger.error("❌ %s失败 %s 条，例如 %s: %s（使用 -v 查看全部）", action, len(failures), item, e)
+
+
+@lru_cache(maxsize=32)
+def _load_link_map(client, app_token: str, table_id: str, link_field: str) -> Dict[str, str]:
+    """逐页读取关联表，构建 {字段值: record_id} 映射
+
+    只请求查找字段本身，不拉取关联表的其他列；同一进程内多次同步时复用结果，不再重复拉取关联表
+    """
+    link_map = {}
+    for rec in client.iter_records(app_token, table_id, field_names=[link_field]):
+        link_value = rec.get("fields", {}).get(link_field)
+        if link_value:
+            link_map[str(link_value)] = rec.get("record_id")
+    return link_map
 
 
 class CheckCommand:
@@ -26,6 +75,17 @@ class CheckCommand:
     
     def run(self) -> bool:
         """执行校验"""
+        # 多次读取表头复用同一个已打开的文件
+        try:
+            with self.reader.open():
+                return self._run()
+        except Exception as e:
+            # 打开文件失败（文件不存在、格式损坏等）
+            logger.error("❌ 校验失败: %s", e)
+            return False
+    
+    def _run(self) -> bool:
+        """执行校验（文件已打开）"""
         try:
             # 检查配置
             if not self.config.is_configured():
@@ -39,44 +99,48 @@ class CheckCommand:
             frozen_headers = self.reader.read_frozen_headers()
             
             # 获取飞书表格字段
-            bitable_fields = self.client.get_fields(self.config.app_token, self.table_id)
-            bitable_field_names = {f.get("field_name") for f in bitable_fields}
+            bitable_field_names = {f.get("field_name") for f in self.client.iter_fields(self.config.app_token, self.table_id)}
+            
+            # 一次集合差运算找出所有缺失字段（空表头不参与校验）
+            missing_names = (set(file_headers) | set(frozen_headers)) - bitable_field_names - {"", None}
             
             # 校验数据区域字段
             errors = []
-            for i, header in enumerate(file_headers):
+            if missing_names:
                 # 兼容ExcelReader和CSVReader
                 data_start = getattr(self.reader, '_data_cols', getattr(self.reader, 'data_cols', (0, 0)))[0]
-                col_letter = chr(ord('A') + i + data_start)
-                if header and header not in bitable_field_names:
-                    errors.append({
+                errors = [
+                    {
                         "type": "field_missing",
-                        "location": f"{col_letter}1",
+                        "location": f"{get_column_letter(i + data_start + 1)}1",
                         "field": header,
                         "message": f"字段 '{header}' 在数据表中不存在"
-                    })
-            
-            # 校验冻结区域字段（用于数据ID）
-            for header in frozen_headers:
-                if header and header not in bitable_field_names:
-                    errors.append({
+                    }
+                    for i, header in enumerate(file_headers) if header in missing_names
+                ]
+                
+                # 校验冻结区域字段（用于数据ID）
+                errors.extend(
+                    {
                         "type": "field_missing",
                         "location": f"冻结区域",
                         "field": header,
                         "message": f"冻结区域字段 '{header}' 在数据表中不存在"
-                    })
+                    }
+                    for header in frozen_headers if header in missing_names
+                )
             
             if errors:
-                print("❌ 校验失败，发现以下问题：\n")
+                logger.error("❌ 校验失败，发现以下问题：\n")
                 for error in errors:
-                    print(f"  [{error['type']}] {error['location']}: {error['message']}")
+                    logger.error("  [%s] %s: %s", error['type'], error['location'], error['message'])
                 return False
             else:
-                print("✅ 校验通过，所有字段都匹配")
+                logger.info("✅ 校验通过，所有字段都匹配")
                 return True
                 
         except Exception as e:
-            print(f"❌ 校验失败: {e}")
+            logger.error("❌ 校验失败: %s", e)
             return False
 
 
@@ -90,6 +154,8 @@ class FlushCommand:
         self.data_zone = data_zone
         self.table_id = table_id
         self.mode = mode  # "field" or "record"
+        self.app_token = None  # 执行同步时从配置读取
+        self._link_field_names = frozenset()  # 单项关联字段名，逐条回退时需拆开单独写入
         
         self.config = get_config()
         self.client = get_client(self.config)
@@ -99,23 +165,155 @@ class FlushCommand:
         """生成数据ID
         数据ID = 企业ID + _ + 数据集 + 会计期间 + 报表类型
         """
-        def to_str(value):
-            """安全转换为字符串"""
-            if value is None:
-                return ""
-            if isinstance(value, list):
-                return ",".join(str(v) for v in value)
-            return str(value)
+        enterprise_id, dataset, period, report_type = map(_to_str, map(frozen_data.get, _DATA_ID_KEYS))
+        return enterprise_id + "_" + dataset + period + report_type
+    
+    def _update_links(self, link_updates: List[Dict]) -> int:
+        """批量更新关联字段，返回关联字段未能完整写入的记录数
+
+        Args:
+            link_updates: [{record_id: ..., fields: {关联字段名: [关联记录ID]}}, ...]
+        """
+        if not link_updates:
+            return 0
+        try:
+            self.client.update_records(
+                self.app_token,
+                self.table_id,
+                link_updates
+            )
+            return 0
+        except TransientError as e:
+            logger.error("❌ 批量更新关联字段失败，跳过 %s 条记录: %s", len(link_updates), e)
+            return len(link_updates)
+        except Exception as e:
+            logger.warning("  ⚠️  批量更新关联字段失败: %s", e)
+            # 回退到逐条逐字段更新，依次发出：同一数据表不支持并发写入
+            failures = []
+            failed_records = set()
+            for update in link_updates:
+                for field_name, link_id in update["fields"].items():
+                    try:
+                        self.client.update_record(
+                            self.app_token,
+                            self.table_id,
+                            update["record_id"],
+                            {field_name: link_id}
+                        )
+                    except Exception as err:
+                        failures.append((f"{update['record_id']}.{field_name}", err))
+                        failed_records.add(update["record_id"])
+            _log_failures("更新关联", failures)
+            return len(failed_records)
+    
+    def _split_link_fields(self, fields: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """将记录字段拆分为 (普通字段, 单项关联字段)"""
+        plain_fields, link_fields = {}, {}
+        for k, v in fields.items():
+            (link_fields if k in self._link_field_names else plain_fields)[k] = v
+        return plain_fields, link_fields
+    
+    def _create_batch(self, batch: List[Dict], data_ids: List[str]) -> Tuple[int, int]:
+        """批量新建一批记录（关联字段随记录一并写入），失败时回退到单条创建，返回 (新建数量, 未完整写入数量)"""
+        try:
+            result = self.client.create_records(
+                self.app_token,
+                self.table_id,
+                batch
+            )
+            created_count = len(result.get("records", []))
+            logger.info("➕ 批量新建 %s 条记录", created_count)
+            return created_count, 0
+        
+        except TransientError as e:
+            # 客户端已按退避重试过仍失败，逐条回退只会成倍放大请求量
+            logger.error("❌ 批量创建失败，跳过本批 %s 条记录: %s", len(batch), e)
+            return 0, len(batch)
+        except Exception as e:
+            logger.error("❌ 批量创建失败: %s", e)
         
-        enterprise_id = to_str(frozen_data.get("企业ID"))
-        dataset = to_str(frozen_data.get("数据集"))
-        period = to_str(frozen_data.get("会计期间"))
-        report_type = to_str(frozen_data.get("报表类型"))
+        # 回退到单条创建，关联字段拆开单独写入，避免关联值错误导致整条记录创建失败
+        created_count = 0
+        link_updates = []
+        failures = []
+        for record, data_id in zip(batch, data_ids):
+            plain_fields, link_fields = self._split_link_fields(record["fields"])
+            try:
+                new_record = self.client.create_record(
+                    self.app_token,
+                    self.table_id,
+                    plain_fields
+                )
+                created_count += 1
+                logger.debug("➕ 新建记录: %s", data_id)
+                
+                if link_fields:
+                    link_updates.append({"record_id": new_record.get("record_id"), "fields": link_fields})
+            except Exception as e:
+                failures.append((data_id, e))
+        _log_failures("创建记录", failures)
         
-        return f"{enterprise_id}_{dataset}{period}{report_type}"
+        # 使用新建返回的 record_id 批量写入关联字段，关联字段写入失败的记录同样计入未写入数量
+        link_failed = self._update_links(link_updates)
+        return created_count, len(failures) + link_failed
+    
+    def _update_batch(self, batch: List[Dict], data_ids: List[str]) -> Tuple[int, int]:
+        """批量更新一批记录（关联字段随记录一并写入），失败时回退到单条更新，返回 (更新数量, 未完整写入数量)"""
+        try:
+            self.client.update_records(
+                self.app_token,
+                self.table_id,
+                batch
+            )
+            updated_count = len(batch)
+            logger.info("🔄 批量更新 %s 条记录", updated_count)
+            return updated_count, 0
+        
+        except TransientError as e:
+            # 客户端已按退避重试过仍失败，逐条回退只会成倍放大请求量
+            logger.error("❌ 批量更新失败，跳过本批 %s 条记录: %s", len(batch), e)
+            return 0, len(batch)
+        except Exception as e:
+            logger.error("❌ 批量更新失败: %s", e)
+        
+        # 回退到单条更新，关联字段拆开单独写入，避免关联值错误导致整条记录更新失败
+        updated_count = 0
+        link_updates = []
+        failures = []
+        for record, data_id in zip(batch, data_ids):
+            plain_fields, link_fields = self._split_link_fields(record["fields"])
+            try:
+                self.client.update_record(
+                    self.app_token,
+                    self.table_id,
+                    record["record_id"],
+                    plain_fields
+                )
+                updated_count += 1
+                logger.debug("🔄 更新记录: %s", data_id)
+                
+                if link_fields:
+                    link_updates.append({"record_id": record["record_id"], "fields": link_fields})
+            except Exception as e:
+                failures.append((data_id, e))
+        _log_failures("更新记录", failures)
+        
+        link_failed = self._update_links(link_updates)
+        return updated_count, len(failures) + link_failed
     
     def run(self) -> Tuple[bool, Dict]:
         """执行同步"""
+        # 读取表头和逐行读取数据复用同一个已打开的文件
+        try:
+            with self.reader.open():
+                return self._run()
+        except Exception as e:
+            # 打开文件失败（文件不存在、格式损坏等）
+            logger.error("❌ 同步失败: %s", e)
+            return False, {}
+    
+    def _run(self) -> Tuple[bool, Dict]:
+        """执行同步（文件已打开）"""
         try:
             # 检查配置
             if not self.config.is_configured():
@@ -124,14 +322,15 @@ class FlushCommand:
             if not self.config.app_token:
                 raise Exception("请先配置app_token")
             
+            # 校验通过后读取一次 app_token，后续读写和各批次写入都直接使用，不再逐次查询配置
+            self.app_token = self.config.app_token
+            
             # 读取文件数据
             frozen_headers = self.reader.read_frozen_headers()
             data_headers = self.reader.read_headers()
-            frozen_data_list = self.reader.read_frozen_data()
-            data_rows = self.reader.read_data()
             
             # 获取飞书表格字段
-            bitable_fields = self.client.get_fields(self.config.app_token, self.table_id)
+            bitable_fields = self.client.get_fields(self.app_token, self.table_id)
             bitable_field_map = {f.get("field_name"): f for f in bitable_fields}
             
             # field模式：检查并创建缺失的字段
@@ -151,25 +350,29 @@ class FlushCommand:
                             "type": 1  # 文本类型
                         })
                     elif header and header in link_fields:
-                        print(f"⚠️  字段 '{header}' 是关联字段，需要手动配置")
+                        logger.warning("⚠️  字段 '%s' 是关联字段，需要手动配置", header)
                 
                 # 批量创建缺失的字段
                 if missing_fields:
-                    print(f"⚠️  发现 {len(missing_fields)} 个新字段，批量创建中...")
-                    self.client.create_fields(
-                        self.config.app_token, 
+                    logger.info("⚠️  发现 %s 个新字段，批量创建中...", len(missing_fields))
+                    result = self.client.create_fields(
+                        self.app_token, 
                         self.table_id, 
                         missing_fields
                     )
-                    print(f"✅ 成功创建 {len(missing_fields)} 个字段")
-                
-                # 刷新字段列表
-                bitable_fields = self.client.get_fields(self.config.app_token, self.table_id)
-                bitable_field_map = {f.get("field_name"): f for f in bitable_fields}
+                    logger.info("✅ 成功创建 %s 个字段", len(missing_fields))
+                    
+                    # 将新建字段直接合入字段列表；接口未返回完整字段信息时再重新拉取
+                    created_fields = result.get("fields") or []
+                    if len(created_fields) == len(missing_fields):
+                        bitable_fields.extend(created_fields)
+                        bitable_field_map.update((f.get("field_name"), f) for f in created_fields)
+                    else:
+                        bitable_fields = self.client.get_fields(self.app_token, self.table_id)
+                        bitable_field_map = {f.get("field_name"): f for f in bitable_fields}
             
-            # 获取飞书表格现有记录
-            existing_records = self.client.get_records(self.config.app_token, self.table_id)
-            time.sleep(REQUEST_INTERVAL)  # 请求间隔
+            # 获取飞书表格现有记录（逐页读取，构建数据ID映射时再消费）
+            existing_records = self.client.iter_records(self.app_token, self.table_id)
             
             # 收集特殊类型字段信息
             # type=18: 日期时间, type=21: 关联, type=3: 单选, type=5: 多选等
@@ -199,292 +402,194 @@ class FlushCommand:
                         special_field_names.add(field_name)
                 # type=18（日期时间）不再默认跳过，飞书API可能返回不准确的类型
             
-            # 构建数据ID到记录的映射
-            # 数据ID存储在某个字段中，假设字段名为"数据ID"
-            def to_str(value):
-                """安全转换为字符串"""
-                if value is None:
-                    return ""
-                if isinstance(value, list):
-                    return ",".join(str(v) for v in value)
-                return str(value)
-            
-            record_map = {}
-            for record in existing_records:
-                fields = record.get("fields", {})
-                data_id = fields.get("数据ID")
-                if data_id:
-                    record_map[to_str(data_id)] = record
+            special_field_names = frozenset(special_field_names)
+            # 逐行写入时需要剔除的字段：特殊类型字段 + 单项关联字段（单项关联字段解析后再合并写入）
+            skip_field_names = special_field_names | single_link_fields.keys()
+            self._link_field_names = frozenset(single_link_fields)
+            # 数字类型字段（type=2），写入前需要转换为数值
+            numeric_field_names = frozenset(name for name, info in bitable_field_map.items() if info.get("type") == 2)
             
-            # 构建关联表查找缓存 {table_id: {字段值: record_id}}
-            link_cache = {}
             # CSV字段名 -> 关联表字段名 的映射
             field_name_mapping = {
                 "企业简称": "企业",  # 企业简称 对应 关联表的"企业"字段
             }
             
-            if single_link_fields:
-                print(f"ℹ️  发现 {len(single_link_fields)} 个单项关联字段，开始构建查找缓存...")
-                for field_name, link_info in single_link_fields.items():
-                    link_table_id = link_info.get("table_id")
+            # 每个关联表只拉取一次 {关联表ID: 查找字段名}
+            link_tables = {}
+            for field_name, link_info in single_link_fields.items():
+                link_table_id = link_info.get("table_id")
+                if link_table_id and link_table_id not in link_tables:
                     # 使用映射规则，否则使用原始字段名
-                    link_field = field_name_mapping.get(field_name, field_name)
-                    
-                    if link_table_id and link_table_id not in link_cache:
-                        # 获取关联表的所有记录
-                        try:
-                            link_records = self.client.get_records(self.config.app_token, link_table_id)
-                            # 构建 {字段值: record_id} 映射
-                            link_cache[link_table_id] = {}
-                            for rec in link_records:
-                                rec_fields = rec.get("fields", {})
-                                link_value = rec_fields.get(link_field)
-                                if link_value:
-                                    link_cache[link_table_id][str(link_value)] = rec.get("record_id")
-                            print(f"  ✓ 关联表 {link_table_id} ({link_field}): {len(link_cache[link_table_id])} 条记录")
-                        except Exception as e:
-                            print(f"  ✗ 获取关联表 {link_table_id} 失败: {e}")
+                    link_tables[link_table_id] = field_name_mapping.get(field_name, field_name)
+            
+            # 构建关联表查找缓存 {table_id: {字段值: record_id}}
+            link_cache = {}
+            
+            # 关联表与主表现有记录相互独立：关联表在后台并发拉取，同时在当前线程读取主表记录
+            with ThreadPoolExecutor(max_workers=LINK_FETCH_WORKERS) as executor:
+                if link_tables:
+                    logger.info("ℹ️  发现 %s 个单项关联字段，开始构建查找缓存...", len(single_link_fields))
+                futures = {
+                    executor.submit(_load_link_map, self.client, self.app_token, link_table_id, link_field): link_table_id
+                    for link_table_id, link_field in link_tables.items()
+                }
+                
+                # 构建数据ID到记录的映射
+                # 数据ID存储在某个字段中，假设字段名为"数据ID"
+                # 一次遍历构建索引 {数据ID: (record_id, 非关联字段字符串值)}，逐行比较时只需转换新值
+                record_index = {}
+                for record in existing_records:
+                    fields = record.get("fields", {})
+                    data_id = fields.get("数据ID")
+                    if data_id:
+                        record_index[_to_str(data_id)] = (
+                            record.get("record_id"),
+                            {k: _to_str(v) for k, v in fields.items() if k not in single_link_fields}
+                        )
+                
+                for future in as_completed(futures):
+                    link_table_id = futures[future]
+                    link_field = link_tables[link_table_id]
+                    try:
+                        link_cache[link_table_id] = future.result()
+                        logger.info("  ✓ 关联表 %s (%s): %s 条记录", link_table_id, link_field, len(link_cache[link_table_id]))
+                    except Exception as e:
+                        logger.warning("  ✗ 获取关联表 %s 失败: %s", link_table_id, e)
+            
+            # 单项关联字段及其查找表 [(字段名, {字段值: record_id})]，只保留查找表构建成功的字段
+            link_resolve = [
+                (field_name, link_cache[link_info.get("table_id")])
+                for field_name, link_info in single_link_fields.items()
+                if link_info.get("table_id") in link_cache
+            ]
             
             # 统计
             stats = {
-                "total": len(data_rows),
+                "total": 0,
                 "created": 0,
                 "updated": 0,
                 "unchanged": 0,
                 "errors": 0
             }
             
-            # 收集需要批量处理的数据
+            # 待提交的批次缓冲区，攒满 BATCH_SIZE 条即提交到写入线程，与后续行的处理并行
             to_create = []  # 需要新建的记录 [{fields: {...}}, ...]
             to_update = []  # 需要更新的记录 [{record_id: ..., fields: {...}}, ...]
-            to_create_ids = []  # 新建记录的数据ID，用于后续关联字段更新
-            to_update_ids = []  # 更新记录的数据ID，用于后续关联字段更新
+            to_create_ids = []  # 新建记录的数据ID，用于回退时输出日志
+            to_update_ids = []  # 更新记录的数据ID，用于回退时输出日志
+            create_jobs = []
+            update_jobs = []
+            pending = threading.BoundedSemaphore(MAX_PENDING_BATCHES)
             
-            # 第一遍：收集所有需要创建和更新的记录（不含关联字段）
-            for i, (frozen_data, data_row) in enumerate(zip(frozen_data_list, data_rows)):
-                try:
-                    data_id = self._generate_data_id(frozen_data)
-                    
-                    # 合并冻结区域和数据区域的数据
-                    merged_fields = {}
-                    merged_fields.update(frozen_data)
-                    merged_fields.update(data_row)
-                    
-                    # 添加数据ID
-                    merged_fields["数据ID"] = data_id
-                    
-                    # 过滤掉特殊类型字段（日期时间等），保留关联字段尝试写入
-                    filtered_fields = {k: v for k, v in merged_fields.items() if k not in special_field_names}
-                    
-                    # 转换数字类型字段
-                    for field_name, field_info in bitable_field_map.items():
-                        if field_name in filtered_fields and field_info.get("type") == 2:  # 数字类型
-                            value = filtered_fields[field_name]
+            with ThreadPoolExecutor(max_workers=FLUSH_WORKERS) as executor:
+                def submit(write_batch, batch: List[Dict], data_ids: List[str]):
+                    """提交一个批次；已有 MAX_PENDING_BATCHES 个批次未完成时阻塞，直到其中一个写完"""
+                    pending.acquire()
+                    job = executor.submit(write_batch, batch, data_ids)
+                    job.add_done_callback(lambda _: pending.release())
+                    return job
+                
+                # 收集需要创建和更新的记录
+                # 单次遍历逐行读取文件，内存中只保留未写完的批次（最多 MAX_PENDING_BATCHES 个）和当前缓冲区
+                for i, (frozen_data, data_row) in enumerate(self.reader.iter_rows()):
+                    stats["total"] += 1
+                    try:
+                        data_id = self._generate_data_id(frozen_data)
+                        
+                        # 合并冻结区域和数据区域的数据，并添加数据ID
+                        merged_fields = {**frozen_data, **data_row, "数据ID": data_id}
+                        
+                        # 过滤掉特殊类型字段和单项关联字段（单项关联字段解析为 record_id 后再写入）
+                        # 没有需要剔除的字段时直接复用 merged_fields，不复制
+                        if skip_field_names:
+                            create_fields = {k: v for k, v in merged_fields.items() if k not in skip_field_names}
+                        else:
+                            create_fields = merged_fields
+                        
+                        # 转换数字类型字段（merged_fields 保留原值用于变更比较，需要时才复制）
+                        numeric_keys = numeric_field_names & create_fields.keys()
+                        if numeric_keys and create_fields is merged_fields:
+                            create_fields = dict(merged_fields)
+                        for field_name in numeric_keys:
+                            value = create_fields[field_name]
                             if value is not None and value != "":
                                 try:
-                                    filtered_fields[field_name] = float(value)
+                                    create_fields[field_name] = float(value)
                                 except (ValueError, TypeError):
                                     pass  # 转换失败保持原值
-                    
-                    # 处理单项关联字段 - 先记录下来
-                    link_field_values = {}
-                    for field_name, link_info in single_link_fields.items():
-                        csv_field_name = field_name
-                        if csv_field_name in merged_fields:
-                            link_value = str(merged_fields[csv_field_name])
-                        elif field_name in merged_fields:
-                            link_value = str(merged_fields[field_name])
-                        else:
-                            continue
-                        
-                        link_table_id = link_info.get("table_id")
-                        if link_table_id and link_value and link_table_id in link_cache:
-                            record_id = link_cache[link_table_id].get(link_value)
-                            if record_id:
-                                link_field_values[field_name] = [record_id]
-                    
-                    # 过滤掉关联字段（不含在第一批创建/更新中）
-                    create_fields = {k: v for k, v in filtered_fields.items() if k not in single_link_fields}
-                    
-                    if data_id in record_map:
-                        # 记录已存在，检查是否需要更新
-                        existing_record = record_map[data_id]
-                        existing_fields = existing_record.get("fields", {})
-                        
-                        def value_to_str(v):
-                            """安全转换为字符串"""
-                            if v is None:
-                                return ""
-                            if isinstance(v, list):
-                                return ",".join(str(x) for x in v)
-                            return str(v)
                         
-                        needs_update = False
-                        for key, value in merged_fields.items():
-                            if key in existing_fields and key not in single_link_fields:
-                                existing_value = existing_fields[key]
-                                if value_to_str(value) != value_to_str(existing_value):
-                                    needs_update = True
-                                    break
+                        # 单项关联字段解析为 [record_id]，直接写入本行的创建/更新字段
+                        # （存在关联字段时 create_fields 必然是过滤后的副本，可直接修改）
+                        for field_name, link_map in link_resolve:
+                            if field_name in merged_fields:
+                                # CSV读出的值已是字符串，只对其他类型（如Excel数字）做转换
+                                link_value = merged_fields[field_name]
+                                record_id = link_map.get(link_value if isinstance(link_value, str) else str(link_value))
+                                if record_id:
+                                    create_fields[field_name] = [record_id]
                         
-                        if needs_update:
-                            to_update.append({
-                                "record_id": existing_record.get("record_id"),
-                                "fields": create_fields
-                            })
-                            to_update_ids.append({
-                                "data_id": data_id,
-                                "link_field_values": link_field_values,
-                                "record_id": existing_record.get("record_id")
-                            })
+                        existing = record_index.get(data_id)
+                        if existing is not None:
+                            # 记录已存在，检查是否需要更新
+                            existing_record_id, existing_fields = existing
+                            
+                            # 只比较两边都有的非关联字段（直接遍历现有值，不为每行构建键交集）
+                            needs_update = any(
+                                key in merged_fields and _to_str(merged_fields[key]) != value
+                                for key, value in existing_fields.items()
+                            )
+                            
+                            if needs_update:
+                                to_update.append({
+                                    "record_id": existing_record_id,
+                                    "fields": create_fields
+                                })
+                                to_update_ids.append(data_id)
+                                if len(to_update) >= BATCH_SIZE:
+                                    update_jobs.append(submit(self._update_batch, to_update, to_update_ids))
+                                    to_update, to_update_ids = [], []
+                            else:
+                                stats["unchanged"] += 1
                         else:
-                            stats["unchanged"] += 1
-                    else:
-                        # 新记录
-                        to_create.append({"fields": create_fields})
-                        to_create_ids.append({
-                            "data_id": data_id,
-                            "link_field_values": link_field_values
-                        })
-                        
-                except Exception as e:
-                    stats["errors"] += 1
-                    print(f"❌ 处理第 {i+1} 行失败: {e}")
-            
-            # 批量新建记录
-            if to_create:
-                # 批量创建，每次最多500条
-                batch_size = 500
-                for i in range(0, len(to_create), batch_size):
-                    batch = to_create[i:i+batch_size]
-                    batch_info = to_create_ids[i:i+batch_size]
-                    
-                    try:
-                        result = self.client.create_records(
-                            self.config.app_token,
-                            self.table_id,
-                            batch
-                        )
-                        # 获取批量创建返回的 record_id 列表
-                        created_records = result.get("records", [])
-                        created_count = len(created_records)
-                        stats["created"] += created_count
-                        print(f"➕ 批量新建 {created_count} 条记录")
-                        
-                        # 批量更新关联字段（使用批量创建返回的 record_id）
-                        for j, info in enumerate(batch_info):
-                            if j < len(created_records) and info["link_field_values"]:
-                                record_id = created_records[j].get("record_id")
-                                for field_name, link_id in info["link_field_values"].items():
-                                    try:
-                                        self.client.update_record(
-                                            self.config.app_token,
-                                            self.table_id,
-                                            record_id,
-                                            {field_name: link_id}
-                                        )
-                                    except Exception as e:
-                                        print(f"  ⚠️  更新关联 '{field_name}' 失败: {e}")
-                                        
+                            # 新记录
+                            to_create.append({"fields": create_fields})
+                            to_create_ids.append(data_id)
+                            if len(to_create) >= BATCH_SIZE:
+                                create_jobs.append(submit(self._create_batch, to_create, to_create_ids))
+                                to_create, to_create_ids = [], []
+                            
                     except Exception as e:
-                        print(f"❌ 批量创建失败: {e}")
-                        # 回退到单条创建
-                        for j, (record, info) in enumerate(zip(batch, batch_info)):
-                            try:
-                                new_record = self.client.create_record(
-                                    self.config.app_token,
-                                    self.table_id,
-                                    record["fields"]
-                                )
-                                stats["created"] += 1
-                                print(f"➕ 新建记录: {info['data_id']}")
-                                
-                                # 更新关联字段
-                                for field_name, link_id in info["link_field_values"].items():
-                                    try:
-                                        self.client.update_record(
-                                            self.config.app_token,
-                                            self.table_id,
-                                            new_record.get("record_id"),
-                                            {field_name: link_id}
-                                        )
-                                    except Exception as e:
-                                        print(f"  ⚠️  更新关联 '{field_name}' 失败: {e}")
-                            except Exception as e:
-                                print(f"❌ 创建记录 {info['data_id']} 失败: {e}")
-            
-            # 批量更新记录
-            if to_update:
-                # 批量更新，每次最多500条
-                batch_size = 500
-                for i in range(0, len(to_update), batch_size):
-                    batch = to_update[i:i+batch_size]
-                    batch_info = to_update_ids[i:i+batch_size]
-                    
-                    try:
-                        self.client.update_records(
-                            self.config.app_token,
-                            self.table_id,
-                            batch
-                        )
-                        updated_count = len(batch)
-                        stats["updated"] += updated_count
-                        print(f"🔄 批量更新 {updated_count} 条记录")
-                        
-                        # 批量更新关联字段
-                        for info in batch_info:
-                            if info["link_field_values"]:
-                                for field_name, link_id in info["link_field_values"].items():
-                                    try:
-                                        self.client.update_record(
-                                            self.config.app_token,
-                                            self.table_id,
-                                            info["record_id"],
-                                            {field_name: link_id}
-                                        )
-                                    except Exception as e:
-                                        print(f"  ⚠️  更新关联 '{field_name}' 失败: {e}")
-                                        
-                    except Exception as e:
-                        print(f"❌ 批量更新失败: {e}")
-                        # 回退到单条更新
-                        for j, (record, info) in enumerate(zip(batch, batch_info)):
-                            try:
-                                self.client.update_record(
-                                    self.config.app_token,
-                                    self.table_id,
-                                    record["record_id"],
-                                    record["fields"]
-                                )
-                                stats["updated"] += 1
-                                print(f"🔄 更新记录: {info['data_id']}")
-                                
-                                # 更新关联字段
-                                for field_name, link_id in info["link_field_values"].items():
-                                    try:
-                                        self.client.update_record(
-                                            self.config.app_token,
-                                            self.table_id,
-                                            info["record_id"],
-                                            {field_name: link_id}
-                                        )
-                                    except Exception as e:
-                                        print(f"  ⚠️  更新关联 '{field_name}' 失败: {e}")
-                            except Exception as e:
-                                print(f"❌ 更新记录 {info['data_id']} 失败: {e}")
+                        stats["errors"] += 1
+                        logger.error("❌ 处理第 %s 行失败: %s", i+1, e)
+                
+                # 提交剩余不足一批的记录，并等待所有批次完成
+                if to_create:
+                    create_jobs.append(submit(self._create_batch, to_create, to_create_ids))
+                if to_update:
+                    update_jobs.append(submit(self._update_batch, to_update, to_update_ids))
+                # 批次中未能写入的记录（包括关联字段写入失败的记录）计入错误数
+                for job in create_jobs:
+                    done, failed = job.result()
+                    stats["created"] += done
+                    stats["errors"] += failed
+                for job in update_jobs:
+                    done, failed = job.result()
+                    stats["updated"] += done
+                    stats["errors"] += failed
             
             # 输出统计
-            print(f"\n📊 同步完成:")
-            print(f"   总记录数: {stats['total']}")
-            print(f"   新建: {stats['created']}")
-            print(f"   更新: {stats['updated']}")
-            print(f"   跳过: {stats['unchanged']}")
-            print(f"   错误: {stats['errors']}")
+            logger.info("\n📊 同步完成:")
+            logger.info("   总记录数: %s", stats['total'])
+            logger.info("   新建: %s", stats['created'])
+            logger.info("   更新: %s", stats['updated'])
+            logger.info("   跳过: %s", stats['unchanged'])
+            logger.info("   错误: %s", stats['errors'])
             
-            return True, stats
+            if stats["errors"]:
+                logger.error("❌ 有 %s 条记录处理或写入失败", stats["errors"])
+            return stats["errors"] == 0, stats
             
         except Exception as e:
-            import traceback
-            print(f"❌ 同步失败: {e}")
+            logger.error("❌ 同步失败: %s", e)
             traceback.print_exc()
             return False, {}
@@ -3,13 +3,17 @@
 import os
 import json
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
+from filelock import FileLock
 
 DEFAULT_CONFIG_FILE = Path.home() / ".tap" / "config.json"
 
 class Config:
     """配置管理类"""
     
+    # 已解析配置缓存 {配置文件路径: (修改时间, 配置字典)}，文件未变化时不再重复解析
+    _cache: Dict[Path, Tuple[int, dict]] = {}
+    
     def __init__(self, config_path: Optional[Path] = None):
         self.config_path = config_path or DEFAULT_CONFIG_FILE
         self._config = {}
@@ -17,18 +21,45 @@ class Config:
     
     def _load(self) -> None:
         """加载配置"""
-        if self.config_path.exists():
-            try:
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    self._config = json.load(f)
-            except Exception:
-                self._config = {}
+        self._config = self._read_file()
+    
+    def _read_file(self) -> dict:
+        """读取磁盘上的配置，返回新的字典；文件修改时间未变时复用已解析的缓存，不再重复解析JSON"""
+        try:
+            mtime = self.config_path.stat().st_mtime_ns
+        except OSError:
+            return {}
+        
+        cached = Config._cache.get(self.config_path)
+        if cached and cached[0] == mtime:
+            return dict(cached[1])
+        
+        try:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            Config._cache[self.config_path] = (mtime, dict(data))
+            return data
+        except Exception:
+            return {}
+    
+    def reload_token(self) -> None:
+        """从磁盘同步其他进程写入的token，其余未保存的修改保持不变"""
+        data = self._read_file()
+        for key in ("tenant_access_token", "tenant_access_token_expires_at"):
+            if key in data:
+                self._config[key] = data[key]
+    
+    def lock(self) -> FileLock:
+        """获取配置文件锁，用于多进程间的"读取-修改-写回"操作"""
+        self.config_path.parent.mkdir(parents=True, exist_ok=True)
+        return FileLock(str(self.config_path) + ".lock")
     
     def save(self) -> None:
         """保存配置"""
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
         with open(self.config_path, 'w', encoding='utf-8') as f:
             json.dump(self._config, f, ensure_ascii=False, indent=2)
+        Config._cache[self.config_path] = (self.config_path.stat().st_mtime_ns, dict(self._config))
     
     @property
     def app_id(self) -> Optional[str]:
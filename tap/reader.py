@@ -1,9 +1,32 @@
 """Excel/CSV文件读取模块"""
 
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Iterator
 from openpyxl import load_workbook
 import csv
+from contextlib import contextmanager
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _col_to_index(col: str) -> int:
+    """将列字母转换为索引（0-based），结果按列缓存"""
+    result = 0
+    for char in col.upper():
+        result = result * 26 + (ord(char) - ord('A') + 1)
+    return result - 1
+
+
+@lru_cache(maxsize=None)
+def _index_to_col(index: int) -> str:
+    """将索引转换为列字母，结果按列缓存"""
+    result = ""
+    index += 1
+    while index > 0:
+        index -= 1
+        result = chr(ord('A') + index % 26) + result
+        index //= 26
+    return result
 
 
 class ExcelReader:
@@ -15,8 +38,8 @@ class ExcelReader:
         
         Args:
             file_path: Excel文件路径
-            frozen_zone: 冻结区域列范围，数字索引，格式: start:end (如"0:5"表示第0到5列，对应A-F)
-            data_zone: 数据区域列范围，数字索引，格式: start:end (如"6:25"表示第6到25列，对应G-Z)
+            frozen_zone: 冻结区域列范围，数字索引或列字母，格式: start:end (如"0:5"或"A:F"表示第0到5列)
+            data_zone: 数据区域列范围，数字索引或列字母，格式: start:end (如"6:25"或"G:Z"表示第6到25列)
         """
         self.file_path = Path(file_path)
         self.frozen_zone = frozen_zone
@@ -24,109 +47,165 @@ class ExcelReader:
         
         self._frozen_cols = self._parse_zone(frozen_zone)
         self._data_cols = self._parse_zone(data_zone)
+        
+        self._wb = None  # open() 上下文内复用的工作簿
     
-    def _parse_zone(self, zone: str) -> Tuple[int, int]:
-        """解析区域字符串，数字索引格式
-        支持格式:
-        - "start:end" -> (start, end) 如 "0:5"
-        - "single" -> (single, single) 如 "5184" 表示只有一列
+    @contextmanager
+    def open(self) -> Iterator["ExcelReader"]:
+        """在上下文内复用同一个已加载的工作簿
+        
+        单独调用 read_headers/read_data 等方法时每次都会重新加载工作簿（大文件较慢），
+        需要连续读取多次时使用: with reader.open(): ...
         """
-        if ":" in zone:
-            start, end = zone.split(":")
-            return (int(start), int(end))
-        else:
-            # 单个数字，表示只有一列
-            single = int(zone)
-            return (single, single)
+        if self._wb is not None:
+            yield self
+            return
+        
+        self._wb = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            yield self
+        finally:
+            self._wb.close()
+            self._wb = None
+    
+    def _parse_zone(self, zone: str) -> Tuple[int, int]:
+        """解析区域字符串，格式同 _parse_zone_tuple"""
+        return _parse_zone_tuple(zone)
     
     def _col_to_index(self, col: str) -> int:
         """将列字母转换为索引（0-based）"""
-        result = 0
-        for char in col.upper():
-            result = result * 26 + (ord(char) - ord('A') + 1)
-        return result - 1
+        return _col_to_index(col)
     
     def _index_to_col(self, index: int) -> str:
         """将索引转换为列字母"""
-        result = ""
-        index += 1
-        while index > 0:
-            index -= 1
-            result = chr(ord('A') + index % 26) + result
-            index //= 26
-        return result
+        return _index_to_col(index)
     
-    def read_headers(self, sheet_index: int = 0) -> List[str]:
-        """读取表头（第一行）"""
-        wb = load_workbook(self.file_path, read_only=True, data_only=True)
-        ws = wb.active
-        
+    def _iter_sheet(self, window: Tuple[int, int]) -> Iterator[Tuple[Any, ...]]:
+        """逐行读取工作表的单元格值（第一行为表头），不逐个访问单元格对象
+
+        只解析 window 指定的列范围 (start, end)，返回的每行元组下标 0 对应第 start 列
+        """
+        wb = self._wb or load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            ws = wb.active
+            # 不传 max_row：按工作表XML流式读取到末尾，不依赖（可能缺失或不准确的）尺寸信息
+            yield from ws.iter_rows(min_row=1, min_col=window[0] + 1, max_col=window[1] + 1, values_only=True)
+        finally:
+            # open() 上下文中的工作簿由上下文负责关闭
+            if wb is not self._wb:
+                wb.close()
+    
+    def _read_header_row(self, cols: Tuple[int, int]) -> Tuple[Any, ...]:
+        """只读取第一行的指定列范围，读完立即结束遍历"""
+        rows = self._iter_sheet(cols)
+        try:
+            return next(rows, ())
+        finally:
+            rows.close()
+    
+    def _zone_headers(self, header_row: Tuple[Any, ...], cols: Tuple[int, int], offset: int) -> List[str]:
+        """从表头行中截取指定列范围的表头（offset 为表头行第一个元素对应的列索引）"""
         headers = []
-        for col in range(self._data_cols[0], self._data_cols[1] + 1):
-            cell_value = ws.cell(row=1, column=col + 1).value
+        for col in range(cols[0] - offset, cols[1] + 1 - offset):
+            cell_value = header_row[col] if col < len(header_row) else None
             headers.append(str(cell_value) if cell_value is not None else "")
-        
-        wb.close()
         return headers
     
+    def read_headers(self, sheet_index: int = 0) -> List[str]:
+        """读取表头（第一行）"""
+        return self._zone_headers(self._read_header_row(self._data_cols), self._data_cols, self._data_cols[0])
+    
     def read_frozen_headers(self, sheet_index: int = 0) -> List[str]:
         """读取冻结区域表头"""
-        wb = load_workbook(self.file_path, read_only=True, data_only=True)
-        ws = wb.active
-        
-        headers = []
-        for col in range(self._frozen_cols[0], self._frozen_cols[1] + 1):
-            cell_value = ws.cell(row=1, column=col + 1).value
-            headers.append(str(cell_value) if cell_value is not None else "")
-        
-        wb.close()
-        return headers
+        return self._zone_headers(self._read_header_row(self._frozen_cols), self._frozen_cols, self._frozen_cols[0])
     
     def read_data(self, sheet_index: int = 0) -> List[Dict[str, Any]]:
         """读取数据区域数据"""
-        wb = load_workbook(self.file_path, read_only=True, data_only=True)
-        ws = wb.active
-        
-        data = []
-        for row_num, row in enumerate(ws.iter_rows(min_row=2, max_row=ws.max_row), start=2):
-            row_data = {}
-            for col in range(self._data_cols[0], self._data_cols[1] + 1):
-                col_letter = self._index_to_col(col)
-                header = ws.cell(row=1, column=col + 1).value
-                if header:
-                    row_data[header] = row[col].value
-            data.append(row_data)
-        
-        wb.close()
-        return data
+        return list(self.iter_data(sheet_index))
+    
+    def iter_data(self, sheet_index: int = 0) -> Iterator[Dict[str, Any]]:
+        """逐行读取数据区域数据"""
+        return (data for (data,) in self._iter_zones((self._data_cols,)))
     
     def read_frozen_data(self, sheet_index: int = 0) -> List[Dict[str, Any]]:
         """读取冻结区域数据"""
-        wb = load_workbook(self.file_path, read_only=True, data_only=True)
-        ws = wb.active
+        return list(self.iter_frozen_data(sheet_index))
+    
+    def iter_frozen_data(self, sheet_index: int = 0) -> Iterator[Dict[str, Any]]:
+        """逐行读取冻结区域数据"""
+        return (data for (data,) in self._iter_zones((self._frozen_cols,)))
+    
+    def iter_rows(self, sheet_index: int = 0) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """逐行读取 (冻结区域数据, 数据区域数据)，只遍历一次工作表"""
+        return self._iter_zones((self._frozen_cols, self._data_cols))
+    
+    @staticmethod
+    def _window(zones: Tuple[Tuple[int, int], ...]) -> Tuple[int, int]:
+        """覆盖所有区域的最小列范围，只解析该范围内的列，跳过无关列"""
+        return (min(cols[0] for cols in zones), max(cols[1] for cols in zones))
+    
+    def _iter_zones(self, zones: Tuple[Tuple[int, int], ...]) -> Iterator[Tuple[Dict[str, Any], ...]]:
+        """逐行读取多个列范围的数据，每行按区域顺序返回一组字典，不在内存中保留整张表"""
+        window = self._window(zones)
+        rows = self._iter_sheet(window)
+        try:
+            header_row = next(rows, None)
+            if header_row is None:
+                return
+            yield from self._zone_rows(header_row, rows, zones, window[0])
+        finally:
+            rows.close()
+    
+    def _zone_rows(self, header_row: Tuple[Any, ...], rows: Iterator[Tuple[Any, ...]],
+                   zones: Tuple[Tuple[int, int], ...], offset: int) -> Iterator[Tuple[Dict[str, Any], ...]]:
+        """将数据行按区域拆分为字典（offset 为每行第一个元素对应的列索引）"""
+        # 表头只解析一次：每个区域保留 [(行内下标, 表头)]，跳过空表头
+        zone_cols = [
+            [(col, header_row[col]) for col in range(cols[0] - offset, min(cols[1] + 1 - offset, len(header_row))) if header_row[col]]
+            for cols in zones
+        ]
         
-        data = []
-        for row_num, row in enumerate(ws.iter_rows(min_row=2, max_row=ws.max_row), start=2):
-            row_data = {}
-            for col in range(self._frozen_cols[0], self._frozen_cols[1] + 1):
-                header = ws.cell(row=1, column=col + 1).value
-                if header:
-                    row_data[header] = row[col].value
-            data.append(row_data)
+        # 单区域单列（如 data_zone="5184"）：直接取该列的值，不走逐列循环
+        if len(zone_cols) == 1 and len(zone_cols[0]) == 1:
+            (col, header), = zone_cols[0]
+            for row in rows:
+                yield ({header: row[col]},)
+            return
         
-        wb.close()
-        return data
+        for row in rows:
+            yield tuple({header: row[col] for col, header in cols} for cols in zone_cols)
     
     def read_all(self, sheet_index: int = 0) -> Tuple[List[str], List[Dict[str, Any]], List[Dict[str, Any]]]:
-        """读取所有数据"""
-        frozen_headers = self.read_frozen_headers(sheet_index)
-        data_headers = self.read_headers(sheet_index)
-        frozen_data = self.read_frozen_data(sheet_index)
-        data_rows = self.read_data(sheet_index)
+        """读取所有数据（只打开并遍历一次工作表）"""
+        zones = (self._frozen_cols, self._data_cols)
+        window = self._window(zones)
+        rows = self._iter_sheet(window)
+        try:
+            header_row = next(rows, None)
+            if header_row is None:
+                return self._zone_headers((), self._frozen_cols, window[0]), [], []
+            
+            frozen_headers = self._zone_headers(header_row, self._frozen_cols, window[0])
+            frozen_data, data_rows = [], []
+            for frozen_row, data_row in self._zone_rows(header_row, rows, zones, window[0]):
+                frozen_data.append(frozen_row)
+                data_rows.append(data_row)
+        finally:
+            rows.close()
         
         return frozen_headers, frozen_data, data_rows
 
 
+def _strip_bom(headers: List[str]) -> List[str]:
+    """去除表头中残留的BOM字符
+
+    utf-8-sig 编码读取时已去除文件开头的BOM，这里只兜底检查第一个表头
+    """
+    if headers and headers[0].startswith('\ufeff'):
+        headers[0] = headers[0].lstrip('\ufeff')
+    return headers
+
+
 class CSVReader:
     """CSV文件读取器"""
     
@@ -136,100 +215,107 @@ class CSVReader:
         self.frozen_cols = frozen_cols or (0, 5)  # 默认A-F
         self.data_cols = data_cols or (6, 25)     # 默认G-Z
     
+    @contextmanager
+    def open(self) -> Iterator["CSVReader"]:
+        """与 ExcelReader.open 接口一致；CSV每次读取只打开文本文件，无需额外缓存"""
+        yield self
+    
+    def _read_header_row(self) -> List[str]:
+        """只读取第一行表头，不读取后续数据行"""
+        with open(self.file_path, 'r', encoding='utf-8-sig', newline='') as f:
+            return _strip_bom(next(csv.reader(f), []))
+    
     def read_headers(self) -> List[str]:
         """读取数据区域表头"""
-        with open(self.file_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
-            headers = list(reader)[0]
-            # 去除BOM字符
-            headers = [h.lstrip('\ufeff') if isinstance(h, str) else h for h in headers]
-            return headers[self.data_cols[0]:self.data_cols[1] + 1]
+        return self._read_header_row()[self.data_cols[0]:self.data_cols[1] + 1]
     
     def read_frozen_headers(self) -> List[str]:
         """读取冻结区域表头"""
-        with open(self.file_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
-            headers = list(reader)[0]
-            # 去除BOM字符
-            headers = [h.lstrip('\ufeff') if isinstance(h, str) else h for h in headers]
-            return headers[self.frozen_cols[0]:self.frozen_cols[1] + 1]
+        return self._read_header_row()[self.frozen_cols[0]:self.frozen_cols[1] + 1]
     
     def read_data(self) -> List[Dict[str, Any]]:
         """读取数据区域数据"""
-        with open(self.file_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
-            all_rows = list(reader)
-            if not all_rows:
-                return []
-            
-            headers = all_rows[0]
-            # 去除BOM字符
-            headers = [h.lstrip('\ufeff') if isinstance(h, str) else h for h in headers]
-            data_headers = headers[self.data_cols[0]:self.data_cols[1] + 1]
-            
-            data = []
-            for row in all_rows[1:]:
-                if len(row) > self.data_cols[0]:
-                    row_data = {}
-                    for i, header in enumerate(data_headers):
-                        idx = self.data_cols[0] + i
-                        if idx < len(row):
-                            row_data[header] = row[idx]
-                    data.append(row_data)
-            return data
+        return list(self.iter_data())
+    
+    def iter_data(self) -> Iterator[Dict[str, Any]]:
+        """逐行读取数据区域数据"""
+        return (data for (data,) in self._iter_zones((self.data_cols,)))
     
     def read_frozen_data(self) -> List[Dict[str, Any]]:
         """读取冻结区域数据"""
-        with open(self.file_path, 'r', encoding='utf-8-sig') as f:
+        return list(self.iter_frozen_data())
+    
+    def iter_frozen_data(self) -> Iterator[Dict[str, Any]]:
+        """逐行读取冻结区域数据"""
+        return (data for (data,) in self._iter_zones((self.frozen_cols,)))
+    
+    def iter_rows(self) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """逐行读取 (冻结区域数据, 数据区域数据)，只解析一次文件"""
+        return self._iter_zones((self.frozen_cols, self.data_cols))
+    
+    def _iter_zones(self, zones: Tuple[Tuple[int, int], ...]) -> Iterator[Tuple[Dict[str, Any], ...]]:
+        """逐行读取多个列范围的数据，每行按区域顺序返回一组字典，不在内存中保留整个文件"""
+        with open(self.file_path, 'r', encoding='utf-8-sig', newline='') as f:
             reader = csv.reader(f)
-            all_rows = list(reader)
-            if not all_rows:
-                return []
+            headers = next(reader, None)
+            if not headers:
+                return
             
-            headers = all_rows[0]
-            # 去除BOM字符
-            headers = [h.lstrip('\ufeff') if isinstance(h, str) else h for h in headers]
-            frozen_headers = headers[self.frozen_cols[0]:self.frozen_cols[1] + 1]
+            headers = _strip_bom(headers)
+            # 每个区域预先计算 [(列索引, 表头)]，逐行只做切片取值
+            zone_cols = [list(enumerate(headers[cols[0]:cols[1] + 1], start=cols[0])) for cols in zones]
+            # 任一区域在该行没有数据则跳过整行，保证各区域逐行对齐
+            min_len = max(cols[0] for cols in zones) + 1
             
-            data = []
-            for row in all_rows[1:]:
-                if len(row) > self.frozen_cols[0]:
-                    row_data = {}
-                    for i, header in enumerate(frozen_headers):
-                        idx = self.frozen_cols[0] + i
-                        if idx < len(row):
-                            row_data[header] = row[idx]
-                    data.append(row_data)
-            return data
+            for row in reader:
+                if len(row) < min_len:
+                    continue
+                row_len = len(row)
+                yield tuple({header: row[idx] for idx, header in cols if idx < row_len} for cols in zone_cols)
 
 
 def _parse_zone_tuple(zone: str) -> Tuple[int, int]:
-    """解析区域字符串为元组
+    """解析区域字符串为元组，支持数字索引（0-based）和列字母两种写法
     支持格式:
-    - "start:end" -> (start, end) 如 "0:5"
-    - "single" -> (single, single) 如 "5184" 表示只有一列
+    - "start:end" -> (start, end) 如 "0:5" 或 "A:F"
+    - "single" -> (single, single) 如 "5184" 或 "G" 表示只有一列
     """
+    def parse_col(col: str) -> int:
+        col = col.strip()
+        return _col_to_index(col) if col.isascii() and col.isalpha() else int(col)
+    
     if ":" in zone:
         start, end = zone.split(":")
-        return (int(start), int(end))
+        return (parse_col(start), parse_col(end))
     else:
-        single = int(zone)
+        # 单个数字或列字母，表示只有一列
+        single = parse_col(zone)
         return (single, single)
 
 
+def _csv_reader(file_path: str, frozen_zone: str, data_zone: str) -> CSVReader:
+    """创建CSV读取器（CSVReader 接收已解析的列范围）"""
+    return CSVReader(file_path, _parse_zone_tuple(frozen_zone), _parse_zone_tuple(data_zone))
+
+
+# 文件扩展名 -> 读取器构造函数，未列出的扩展名按Excel文件读取
+_READERS = {
+    ".csv": _csv_reader,
+    ".xlsx": ExcelReader,
+    ".xlsm": ExcelReader,
+}
+
+
 def get_reader(file_path: str, frozen_zone: str = "0:5", data_zone: str = "6:25"):
     """获取合适的文件读取器
     
+    每次调用返回新的实例，不做缓存：读取器在 open() 上下文中持有已打开的工作簿，
+    共享实例时一个调用方退出 open() 会关闭另一个调用方正在使用的工作簿
+    
     Args:
         file_path: 文件路径
-        frozen_zone: 冻结区域列范围，数字索引格式 (如 "0:5")
-        data_zone: 数据区域列范围，数字索引格式 (如 "6:25" 或 "5184" 表示单列)
+        frozen_zone: 冻结区域列范围，数字索引或列字母 (如 "0:5" 或 "A:F")
+        data_zone: 数据区域列范围，数字索引或列字母 (如 "6:25"、"G:Z" 或 "5184" 表示单列)
     """
-    path = Path(file_path)
-    if path.suffix.lower() == '.csv':
-        # 解析数字索引格式
-        frozen_cols = _parse_zone_tuple(frozen_zone)
-        data_cols = _parse_zone_tuple(data_zone)
-        return CSVReader(file_path, frozen_cols, data_cols)
-    else:
-        return ExcelReader(file_path, frozen_zone, data_zone)
+    create = _READERS.get(Path(file_path).suffix.lower(), ExcelReader)
+    return create(file_path, frozen_zone, data_zone)